@@ -141,6 +141,15 @@ class HTTPClientService(service.SharedService):
         })
         return None
 
+    def expect_many(self, expectations):
+        """Register several expected requests at once, in order.
+
+        Each item of ``expectations`` is a dict of the keyword arguments accepted by
+        ``expect``.
+        """
+        for expectation in expectations:
+            self.expect(**expectation)
+
     def assertNoOutstanding(self):
         self.case.assertEqual(
             0, len(self._expected), f"expected more http requests:\n {self._expected!r}"
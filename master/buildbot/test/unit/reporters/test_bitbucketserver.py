@@ -33,7 +33,6 @@ from buildbot.reporters.bitbucketserver import BitbucketServerStatusPush
 from buildbot.reporters.generators.build import BuildStartEndStatusGenerator
 from buildbot.reporters.generators.build import BuildStatusGenerator
 from buildbot.reporters.generators.buildset import BuildSetStatusGenerator
-from buildbot.reporters.message import MessageFormatter
 from buildbot.reporters.message import MessageFormatterRenderable
 from buildbot.test.fake import fakemaster
 from buildbot.test.fake import httpclientservice as fakehttpclientservice
@@ -43,6 +42,8 @@ from buildbot.test.util.logging import LoggingMixin
 from buildbot.test.util.reporter import ReporterTestMixin
 
 HTTP_NOT_FOUND = 404
+STATUS_API = '/rest/build-status/1.0/commits/d34db33fd43db33f'
+STATUS_BASE_JSON = {'url': 'http://localhost:8080/#/builders/79/builds/0', 'key': 'Builder0'}
 
 
 class TestException(Exception):
@@ -57,13 +58,13 @@ class TestBitbucketServerStatusPush(
         self.setup_test_reactor()
         self.setup_reporter_test()
         self.master = fakemaster.make_master(self, wantData=True, wantDb=True, wantMq=True)
+        self._http = yield fakehttpclientservice.HTTPClientService.getService(
+            self.master, self, 'serv', auth=('username', 'passwd'), debug=None, verify=None
+        )
         yield self.master.startService()
 
     @defer.inlineCallbacks
     def setupReporter(self, **kwargs):
-        self._http = yield fakehttpclientservice.HTTPClientService.getService(
-            self.master, self, 'serv', auth=('username', 'passwd'), debug=None, verify=None
-        )
         self.sp = BitbucketServerStatusPush(
             "serv", Interpolate("username"), Interpolate("passwd"), **kwargs
         )
@@ -76,38 +77,37 @@ class TestBitbucketServerStatusPush(
     @defer.inlineCallbacks
     def _check_start_and_finish_build(self, build):
         # we make sure proper calls to txrequests have been made
-        self._http.expect(
-            'post',
-            '/rest/build-status/1.0/commits/d34db33fd43db33f',
-            json={
-                'url': 'http://localhost:8080/#/builders/79/builds/0',
-                'state': 'INPROGRESS',
-                'key': 'Builder0',
-                'description': 'Build started.',
+        self._http.expect_many([
+            {
+                'method': 'post',
+                'ep': STATUS_API,
+                'json': {
+                    **STATUS_BASE_JSON,
+                    'state': 'INPROGRESS',
+                    'description': 'Build started.',
+                },
+                'code': HTTP_PROCESSED,
             },
-            code=HTTP_PROCESSED,
-        )
-        self._http.expect(
-            'post',
-            '/rest/build-status/1.0/commits/d34db33fd43db33f',
-            json={
-                'url': 'http://localhost:8080/#/builders/79/builds/0',
-                'state': 'SUCCESSFUL',
-                'key': 'Builder0',
-                'description': 'Build done.',
+            {
+                'method': 'post',
+                'ep': STATUS_API,
+                'json': {
+                    **STATUS_BASE_JSON,
+                    'state': 'SUCCESSFUL',
+                    'description': 'Build done.',
+                },
+                'code': HTTP_PROCESSED,
             },
-            code=HTTP_PROCESSED,
-        )
-        self._http.expect(
-            'post',
-            '/rest/build-status/1.0/commits/d34db33fd43db33f',
-            json={
-                'url': 'http://localhost:8080/#/builders/79/builds/0',
-                'state': 'FAILED',
-                'key': 'Builder0',
-                'description': 'Build done.',
+            {
+                'method': 'post',
+                'ep': STATUS_API,
+                'json': {
+                    **STATUS_BASE_JSON,
+                    'state': 'FAILED',
+                    'description': 'Build done.',
+                },
             },
-        )
+        ])
         build['complete'] = False
         yield self.sp._got_event(('builds', 20, 'new'), build)
         build['complete'] = True
@@ -117,7 +117,7 @@ class TestBitbucketServerStatusPush(
 
     @defer.inlineCallbacks
     def test_basic(self):
-        self.setupReporter()
+        yield self.setupReporter()
         build = yield self.insert_build_finished(SUCCESS)
         yield self._check_start_and_finish_build(build)
 
@@ -128,45 +128,44 @@ class TestBitbucketServerStatusPush(
             end_formatter=MessageFormatterRenderable('Build finished.'),
         )
 
-        self.setupReporter(statusName='Build', generators=[generator])
+        yield self.setupReporter(statusName='Build', generators=[generator])
         build = yield self.insert_build_finished(SUCCESS)
         # we make sure proper calls to txrequests have been made
-        self._http.expect(
-            'post',
-            '/rest/build-status/1.0/commits/d34db33fd43db33f',
-            json={
-                'url': 'http://localhost:8080/#/builders/79/builds/0',
-                'state': 'INPROGRESS',
-                'key': 'Builder0',
-                'name': 'Build',
-                'description': 'Build started.',
+        self._http.expect_many([
+            {
+                'method': 'post',
+                'ep': STATUS_API,
+                'json': {
+                    **STATUS_BASE_JSON,
+                    'state': 'INPROGRESS',
+                    'name': 'Build',
+                    'description': 'Build started.',
+                },
+                'code': HTTP_PROCESSED,
             },
-            code=HTTP_PROCESSED,
-        )
-        self._http.expect(
-            'post',
-            '/rest/build-status/1.0/commits/d34db33fd43db33f',
-            json={
-                'url': 'http://localhost:8080/#/builders/79/builds/0',
-                'state': 'SUCCESSFUL',
-                'key': 'Builder0',
-                'name': 'Build',
-                'description': 'Build finished.',
+            {
+                'method': 'post',
+                'ep': STATUS_API,
+                'json': {
+                    **STATUS_BASE_JSON,
+                    'state': 'SUCCESSFUL',
+                    'name': 'Build',
+                    'description': 'Build finished.',
+                },
+                'code': HTTP_PROCESSED,
             },
-            code=HTTP_PROCESSED,
-        )
-        self._http.expect(
-            'post',
-            '/rest/build-status/1.0/commits/d34db33fd43db33f',
-            json={
-                'url': 'http://localhost:8080/#/builders/79/builds/0',
-                'state': 'FAILED',
-                'key': 'Builder0',
-                'name': 'Build',
-                'description': 'Build finished.',
+            {
+                'method': 'post',
+                'ep': STATUS_API,
+                'json': {
+                    **STATUS_BASE_JSON,
+                    'state': 'FAILED',
+                    'name': 'Build',
+                    'description': 'Build finished.',
+                },
+                'code': HTTP_PROCESSED,
             },
-            code=HTTP_PROCESSED,
-        )
+        ])
         build['complete'] = False
         yield self.sp._got_event(('builds', 20, 'new'), build)
         build['complete'] = True
@@ -176,16 +175,15 @@ class TestBitbucketServerStatusPush(
 
     @defer.inlineCallbacks
     def test_error(self):
-        self.setupReporter()
+        yield self.setupReporter()
         build = yield self.insert_build_finished(SUCCESS)
         # we make sure proper calls to txrequests have been made
         self._http.expect(
             'post',
-            '/rest/build-status/1.0/commits/d34db33fd43db33f',
+            STATUS_API,
             json={
-                'url': 'http://localhost:8080/#/builders/79/builds/0',
+                **STATUS_BASE_JSON,
                 'state': 'INPROGRESS',
-                'key': 'Builder0',
                 'description': 'Build started.',
             },
             code=HTTP_NOT_FOUND,
@@ -629,6 +627,16 @@ EXPECTED_API = '/rest/api/1.0/projects/PRO/repos/myrepo/pull-requests/20/comment
 PR_URL = "http://example.com/projects/PRO/repos/myrepo/pull-requests/20"
 
 
+class FakeMessageFormatter:
+    want_properties = True
+    want_steps = False
+    want_logs = False
+    want_logs_content = False
+
+    def format_message_for_build(self, master, build, **kwargs):
+        return {"body": UNICODE_BODY, "type": "text", "subject": "subject", "extra_info": None}
+
+
 class TestBitbucketServerPRCommentPush(
     TestReactorMixin, unittest.TestCase, ReporterTestMixin, LoggingMixin
 ):
@@ -645,19 +653,7 @@ class TestBitbucketServerPRCommentPush(
             self.master, self, 'serv', auth=('username', 'passwd'), debug=None, verify=None
         )
 
-        formatter = Mock(spec=MessageFormatter)
-        formatter.format_message_for_build.return_value = {
-            "body": UNICODE_BODY,
-            "type": "text",
-            "subject": "subject",
-            "extra_info": None,
-        }
-        formatter.want_properties = True
-        formatter.want_steps = False
-        formatter.want_logs = False
-        formatter.want_logs_content = False
-
-        generator = generator_class(message_formatter=formatter)
+        generator = generator_class(message_formatter=FakeMessageFormatter())
 
         self.cp = BitbucketServerPRCommentPush(
             "serv",
@@ -67,3 +67,15 @@ class Test(unittest.TestCase):
             yield self.tested.doGetRoot()
         except Exception as e:
             self.assertEqual(str(e), '404: server did not succeed')
+
+    @defer.inlineCallbacks
+    def test_expect_many(self):
+        self._http.expect_many([
+            {"method": "get", "ep": "/", "content_json": {'foo': 'bar'}},
+            {"method": "get", "ep": "/", "content_json": {'foo': 'baz'}},
+        ])
+
+        response = yield self.tested.doGetRoot()
+        self.assertEqual(response, {'foo': 'bar'})
+        response = yield self.tested.doGetRoot()
+        self.assertEqual(response, {'foo': 'baz'})
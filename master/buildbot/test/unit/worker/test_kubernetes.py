@@ -136,6 +136,36 @@ class TestKubernetesWorker(TestReactorMixin, unittest.TestCase):
         # http is lazily created on worker substantiation
         self.assertNotEqual(worker._kube, None)
 
+    @defer.inlineCallbacks
+    def test_reconfig_keeps_equal_kube_config(self):
+        config = KubeHardcodedConfig(master_url="https://kube.example.com")
+        worker = yield self.setupWorker('worker', config=config)
+
+        new_config = KubeHardcodedConfig(master_url="https://kube.example.com")
+        new_worker = kubernetes.KubeLatentWorker(
+            'worker', masterFQDN="buildbot-master", kube_config=new_config, missing_timeout=10
+        )
+        yield worker.reconfigServiceWithSibling(new_worker)
+
+        self.assertIs(worker._kube_config, config)
+        self.assertTrue(config.running)
+        self.assertFalse(new_config.running)
+
+    @defer.inlineCallbacks
+    def test_reconfig_replaces_changed_kube_config(self):
+        config = KubeHardcodedConfig(master_url="https://kube.example.com")
+        worker = yield self.setupWorker('worker', config=config)
+
+        new_config = KubeHardcodedConfig(master_url="https://kube.example.com", namespace="other")
+        new_worker = kubernetes.KubeLatentWorker(
+            'worker', masterFQDN="buildbot-master", kube_config=new_config
+        )
+        yield worker.reconfigServiceWithSibling(new_worker)
+
+        self.assertIs(worker._kube_config, new_config)
+        self.assertFalse(config.running)
+        self.assertTrue(new_config.running)
+
     def expect_pod_delete_nonexisting(self):
         self._http.expect(
             "delete",
@@ -214,7 +244,6 @@ class TestKubernetesWorker(TestReactorMixin, unittest.TestCase):
     def test_start_worker(self):
         worker = yield self.setupWorker('worker')
         self.expect_pod_delete_nonexisting()
-        self.expect_pod_status_not_found()
         self.expect_pod_startup("rendered:buildbot/buildbot-worker")
         self.expect_pod_delete_existing("rendered:buildbot/buildbot-worker")
         self.expect_pod_status_not_found()
@@ -227,9 +256,7 @@ class TestKubernetesWorker(TestReactorMixin, unittest.TestCase):
     def test_start_worker_but_error(self):
         worker = yield self.setupWorker('worker')
         self.expect_pod_delete_nonexisting()
-        self.expect_pod_status_not_found()
         self.expect_pod_delete_nonexisting()
-        self.expect_pod_status_not_found()
 
         def create_pod(namespace, spec):
             raise kubernetes.KubeJsonError(400, {'message': "yeah, but no"})
@@ -244,15 +271,36 @@ class TestKubernetesWorker(TestReactorMixin, unittest.TestCase):
         worker = yield self.setupWorker('worker')
 
         self.expect_pod_delete_nonexisting()
-        self.expect_pod_status_not_found()
         self.expect_pod_startup_error("rendered:buildbot/buildbot-worker")
         self.expect_pod_delete_nonexisting()
-        self.expect_pod_status_not_found()
 
         with self.assertRaises(LatentWorkerFailedToSubstantiate):
             yield worker.substantiate(None, FakeBuild())
         self.assertEqual(worker.instance, None)
 
+    @defer.inlineCallbacks
+    def test_get_pod_spec_customization_returns_deferred(self):
+        worker = yield self.setupWorker('worker')
+
+        def get_volumes(build):
+            return defer.succeed([{"name": "cache", "emptyDir": {}}])
+
+        worker.get_volumes = get_volumes
+        spec = yield worker.getPodSpec(FakeBuild())
+        self.assertEqual(spec["spec"]["volumes"], [{"name": "cache", "emptyDir": {}}])
+        self.assertEqual(spec["spec"]["nodeSelector"], {})
+
+    @defer.inlineCallbacks
+    def test_get_pod_spec_customization_error_is_not_wrapped(self):
+        worker = yield self.setupWorker('worker')
+
+        def get_volumes(build):
+            return defer.fail(kubernetes.KubeError("no volumes"))
+
+        worker.get_volumes = get_volumes
+        with self.assertRaises(kubernetes.KubeError):
+            yield worker.getPodSpec(FakeBuild())
+
     @defer.inlineCallbacks
     def test_interpolate_renderables_for_new_build(self):
         build1 = Properties(img_prop="image1")
@@ -260,7 +308,6 @@ class TestKubernetesWorker(TestReactorMixin, unittest.TestCase):
         worker = yield self.setupWorker('worker', image=Interpolate("%(prop:img_prop)s"))
 
         self.expect_pod_delete_nonexisting()
-        self.expect_pod_status_not_found()
         self.expect_pod_startup("image1")
         self.expect_pod_delete_existing("image1")
         self.expect_pod_status_not_found()
@@ -269,6 +316,24 @@ class TestKubernetesWorker(TestReactorMixin, unittest.TestCase):
         yield worker.stop_instance()
         self.assertTrue((yield worker.isCompatibleWithBuild(build2)))
 
+    @defer.inlineCallbacks
+    def test_start_worker_skips_delete_after_known_stop(self):
+        worker = yield self.setupWorker('worker')
+
+        self.expect_pod_delete_nonexisting()
+        self.expect_pod_startup("rendered:buildbot/buildbot-worker")
+        self.expect_pod_delete_existing("rendered:buildbot/buildbot-worker")
+        self.expect_pod_status_not_found()
+        # the pod is known to be gone, so the second start does not delete it first
+        self.expect_pod_startup("rendered:buildbot/buildbot-worker")
+        self.expect_pod_delete_existing("rendered:buildbot/buildbot-worker")
+        self.expect_pod_status_not_found()
+
+        yield worker.start_instance(FakeBuild())
+        yield worker.stop_instance()
+        yield worker.start_instance(FakeBuild())
+        yield worker.stop_instance()
+
     @defer.inlineCallbacks
     def test_reject_incompatible_build_while_running(self):
         build1 = Properties(img_prop="image1")
@@ -276,7 +341,6 @@ class TestKubernetesWorker(TestReactorMixin, unittest.TestCase):
         worker = yield self.setupWorker('worker', image=Interpolate("%(prop:img_prop)s"))
 
         self.expect_pod_delete_nonexisting()
-        self.expect_pod_status_not_found()
         self.expect_pod_startup("image1")
         self.expect_pod_delete_existing("image1")
         self.expect_pod_status_not_found()
@@ -297,7 +361,6 @@ class TestKubernetesWorker(TestReactorMixin, unittest.TestCase):
         )
 
         self.expect_pod_delete_nonexisting()
-        self.expect_pod_status_not_found()
 
         with self.assertRaises(LatentWorkerFailedToSubstantiate) as e:
             yield worker.substantiate(None, FakeBuild())
@@ -324,7 +387,6 @@ class TestKubernetesWorker(TestReactorMixin, unittest.TestCase):
         worker = yield self.setupWorker('worker')
 
         self.expect_pod_delete_nonexisting()
-        self.expect_pod_status_not_found()
 
         expected_metadata = {"name": "buildbot-worker-87de7e"}
         expected_spec = {
@@ -361,7 +423,6 @@ class TestKubernetesWorker(TestReactorMixin, unittest.TestCase):
             content="not json",
         )
         self.expect_pod_delete_nonexisting()
-        self.expect_pod_status_not_found()
 
         with self.assertRaises(LatentWorkerFailedToSubstantiate) as e:
             yield worker.substantiate(None, FakeBuild())
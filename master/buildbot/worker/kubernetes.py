@@ -21,6 +21,7 @@ from buildbot.util import asyncSleep
 from buildbot.util import httpclientservice
 from buildbot.util import kubeclientservice
 from buildbot.util.latent import CompatibleLatentWorkerMixin
+from buildbot.util.twisted import async_to_deferred
 from buildbot.worker.docker import DockerBaseWorker
 
 log = Logger()
@@ -49,31 +50,66 @@ class KubeLatentWorker(CompatibleLatentWorkerMixin, DockerBaseWorker):
     _namespace = None
     _kube = None
     _kube_config = None
-
-    @defer.inlineCallbacks
-    def getPodSpec(self, build):
-        image = yield build.render(self.image)
-        env = yield self.createEnvironment(build)
-
+    # Whether a pod with our name may exist on the cluster. This is unknown until we have
+    # seen the pod deleted ourselves, e.g. after a master restart or a reconfig.
+    _pod_may_exist = True
+
+    @async_to_deferred
+    async def getPodSpec(self, build):
+        # The customization points do not depend on each other, so the ones returning a
+        # Deferred are waited for concurrently. Most return plain values, which are used as is.
+        values = [
+            build.render(self.image),
+            self.createEnvironment(build),
+            self.get_affinity(build),
+            self.getBuildContainerResources(build),
+            self.get_build_container_volume_mounts(build),
+            self.getServicesContainers(build),
+            self.get_node_selector(build),
+            self.get_volumes(build),
+        ]
+        pending = [i for i, value in enumerate(values) if isinstance(value, defer.Deferred)]
+        if pending:
+            try:
+                results = await defer.gatherResults(
+                    [values[i] for i in pending], consumeErrors=True
+                )
+            except defer.FirstError as e:
+                raise e.subFailure.value
+            for i, result in zip(pending, results):
+                values[i] = result
+
+        (
+            image,
+            env,
+            affinity,
+            resources,
+            volume_mounts,
+            services_containers,
+            node_selector,
+            volumes,
+        ) = values
+
+        name = self.getContainerName()
         return {
             "apiVersion": "v1",
             "kind": "Pod",
-            "metadata": {"name": self.getContainerName()},
+            "metadata": {"name": name},
             "spec": {
-                "affinity": (yield self.get_affinity(build)),
+                "affinity": affinity,
                 "containers": [
                     {
-                        "name": self.getContainerName(),
+                        "name": name,
                         "image": image,
                         "env": [{"name": k, "value": v} for k, v in env.items()],
-                        "resources": (yield self.getBuildContainerResources(build)),
-                        "volumeMounts": (yield self.get_build_container_volume_mounts(build)),
+                        "resources": resources,
+                        "volumeMounts": volume_mounts,
                     }
                 ]
-                + (yield self.getServicesContainers(build)),
-                "nodeSelector": (yield self.get_node_selector(build)),
+                + services_containers,
+                "nodeSelector": node_selector,
                 "restartPolicy": "Never",
-                "volumes": (yield self.get_volumes(build)),
+                "volumes": volumes,
             },
         }
 
@@ -133,20 +169,26 @@ class KubeLatentWorker(CompatibleLatentWorkerMixin, DockerBaseWorker):
         if callable(masterFQDN):
             masterFQDN = masterFQDN()
 
-        self._http = yield httpclientservice.HTTPClientService.getService(
-            self.master, kube_config.get_master_url()
-        )
+        if self.running and self._kube is not None and self._kube_config == kube_config:
+            # keep the registered config, so that it is not stopped and restarted along with
+            # whatever it maintains (e.g. a kubectl proxy) when nothing has changed
+            kube_config = self._kube_config
+        else:
+            if self.running and self._kube is not None:
+                yield self._kube.unregister(self)
 
-        if self.running and self._kube is not None:
-            yield self._kube.unregister(self)
+            self._kube = yield kubeclientservice.KubeClientService.getService(self.master)
+            self._kube_config = kube_config
 
-        self._kube = yield kubeclientservice.KubeClientService.getService(self.master)
-        self._kube_config = kube_config
+            if self.running:
+                yield self._kube.register(self, kube_config)
 
-        if self.running:
-            yield self._kube.register(self, kube_config)
+        self._http = yield httpclientservice.HTTPClientService.getService(
+            self.master, kube_config.get_master_url()
+        )
 
         self._namespace = namespace or kube_config.getConfig()['namespace']
+        self._pod_may_exist = True
 
         yield super().reconfigService(name, image=image, masterFQDN=masterFQDN, **kwargs)
 
@@ -160,30 +202,36 @@ class KubeLatentWorker(CompatibleLatentWorkerMixin, DockerBaseWorker):
         yield self._kube.unregister(self)
         yield super().stopService()
 
-    @defer.inlineCallbacks
-    def start_instance(self, build):
+    @async_to_deferred
+    async def start_instance(self, build):
         try:
-            yield self.stop_instance(reportFailure=False)
-            pod_spec = yield self.renderWorkerPropsOnStart(build)
-            yield self._create_pod(self._namespace, pod_spec)
+            if self._pod_may_exist:
+                await self.stop_instance(reportFailure=False)
+            pod_spec = await self.renderWorkerPropsOnStart(build)
+            self._pod_may_exist = True
+            await self._create_pod(self._namespace, pod_spec)
         except KubeError as e:
             raise LatentWorkerFailedToSubstantiate(str(e)) from e
         return True
 
-    @defer.inlineCallbacks
-    def stop_instance(self, fast=False, reportFailure=True):
+    @async_to_deferred
+    async def stop_instance(self, fast=False, reportFailure=True):
         self.current_pod_spec = None
         self.resetWorkerPropsOnStop()
+        name = self.getContainerName()
         try:
-            yield self._delete_pod(self._namespace, self.getContainerName())
+            await self._delete_pod(self._namespace, name)
         except KubeJsonError as e:
-            if reportFailure and e.reason != 'NotFound':
+            if e.reason == 'NotFound':
+                # there is no pod, so there is no deletion to wait for
+                self._pod_may_exist = False
+                return
+            if reportFailure:
                 raise
         if fast:
             return
-        yield self._wait_for_pod_deletion(
-            self._namespace, self.getContainerName(), timeout=self.missing_timeout
-        )
+        await self._wait_for_pod_deletion(self._namespace, name, timeout=self.missing_timeout)
+        self._pod_may_exist = False
 
     @defer.inlineCallbacks
     def _get_request_kwargs(self):